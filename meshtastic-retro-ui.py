@@ -9,10 +9,18 @@ Retro Meshtastic Badge – 3.5” Touch, Headless Edition
 • Quit with Ctrl-C or Q
 • Persists to ~/.retrobadge/{meshtastic.db,meshtastic.log}
 """
-import os, json, sqlite3, signal, queue, threading, time, curses, textwrap
+import os, sys, json, sqlite3, signal, queue, threading, time, curses, textwrap, select
+import itertools
+from collections import deque
+try:
+    import orjson
+except ImportError:      # stdlib json fallback; setup.sh installs orjson
+    orjson = None
 import curses.textpad
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
+from contextlib import closing
 from meshtastic.ble_interface import BLEInterface
 from pubsub import pub
 import asyncio
@@ -25,78 +33,242 @@ DB_FILE  = DATA_DIR / "meshtastic.db"
 LOG_FILE = DATA_DIR / "meshtastic.log"
 NODE_ADDR = os.getenv("MESHTASTIC_BLE_ADDR", "NOT_CONFIGURED")  # Will be set by run_badge.sh
 MAX_LEN, PAD_V = 240, 2  # truncate length, vertical padding
+MAX_MSGS = 4096          # scrollback kept in memory by the UI
+VERBOSE_LOG = bool(os.getenv("MESHTASTIC_VERBOSE_LOG"))  # dump whole packets to the log
+
+if orjson:
+    _ORJSON_OPTS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=str, option=_ORJSON_OPTS)
+else:
+    def _dumps(obj) -> bytes:
+        return (json.dumps(obj, default=str) + "\n").encode()
 
 # ── PERSISTENCE ─────────────────────────────────────────────────────────────
-json_fh = open(LOG_FILE, "a", encoding="utf-8", buffering=1)
-db      = sqlite3.connect(DB_FILE, check_same_thread=False)
-with db:
-    db.execute("""
-      CREATE TABLE IF NOT EXISTS messages (
-        ts   REAL,
-        src  TEXT,
-        txt  TEXT
-      )""")
+# log_writer appends packets/status lines straight to log_fd; json_fh is the
+# block-buffered text handle BLEInterface's debugOut needs (flushed by
+# log_writer every LOG_FLUSH_SECS). Both are O_APPEND, so lines never clobber.
+log_fd  = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+json_fh = open(LOG_FILE, "a", encoding="utf-8", buffering=64*1024)
+
+def _connect(readonly: bool = False) -> sqlite3.Connection:
+    """Open a connection owned by the calling thread (no check_same_thread
+    escape hatch): db_writer holds the only writer, readers open mode=ro."""
+    if readonly:
+        conn = sqlite3.connect(f"{DB_FILE.as_uri()}?mode=ro", uri=True)
+        conn.execute("PRAGMA query_only=1")
+        return conn
+    # isolation_level=None: no implicit transactions; db_writer issues its
+    # own BEGIN IMMEDIATE / COMMIT around each batch.
+    conn = sqlite3.connect(DB_FILE, isolation_level=None)
+    # WAL + NORMAL sync: one cheap fsync per checkpoint instead of two per
+    # commit on the SD card, and readers never block the writer. SQLite
+    # auto-checkpoints the -wal file back into the DB every 1000 pages
+    # (~4 MB), so it stays small without manual checkpoints. A power cut can
+    # roll back the last few commits but cannot corrupt the DB. The busy
+    # timeout is sqlite3.connect()'s default 5 s.
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL",
+                   "temp_store=MEMORY", "cache_size=-8000"):   # ~8 MB page cache
+        try:
+            conn.execute(f"PRAGMA {pragma}")
+        except sqlite3.Error:
+            pass    # older SQLite / odd filesystem: keep its default
+    return conn
+
+_schema = _connect()
+_schema.execute("""
+  CREATE TABLE IF NOT EXISTS messages (
+    ts   REAL,
+    src  TEXT,
+    txt  TEXT
+  )""")
+_schema.execute("CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(ts)")
+_schema.close()
 
 # ── SHARED STATE ─────────────────────────────────────────────────────────────
-incoming_q  = queue.Queue(1024)
-outgoing_q  = queue.Queue(256)
+class _DrainQueue(queue.SimpleQueue):
+    """RX hand-off: C-level unbounded FIFO (no condvars, no bound to check —
+    the UI's deque caps what is kept). drain() empties it in one call."""
+    def drain(self) -> list:
+        items, get = [], self.get_nowait
+        try:
+            while True:
+                items.append(get())
+        except queue.Empty:
+            return items
+
+incoming_q  = _DrainQueue()
+outgoing_q  = queue.Queue(256)          # bounded: back-pressure on sends
 link_up_evt = threading.Event()
 stop_evt    = threading.Event()
-_iface_lock = threading.Lock()
-_iface      = None
+reconnect_evt = threading.Event()   # link lost (or shutting down) → worker reconnects
+_iface      = None   # set only by _radio_worker; _sender reads the reference
 connection_status = "Initializing..."  # For UI display
+connected_addr = NODE_ADDR              # address the worker last (re)connected to
 last_connection_attempt = 0
 
-db_q = queue.Queue()
+# Self-pipe: producers write a byte so the UI's select() wakes immediately
+# instead of polling the queues on a timer.
+_wake_r, _wake_w = os.pipe()
+os.set_blocking(_wake_r, False)
+os.set_blocking(_wake_w, False)
+
+_wake_pending = threading.Event()   # a byte is already in the pipe
+
+def _wake_pipe():
+    # Unconditional; safe from signal handlers (no Event lock involved).
+    try:
+        os.write(_wake_w, b"\0")
+    except BlockingIOError:
+        pass    # pipe full → UI already has a wake-up pending
+
+def _wake_ui():
+    # A burst of N packets writes one byte and costs the UI one redraw. The
+    # UI reads the pipe, then clears the flag, then drains the queues: a
+    # producer that sees the flag still set has already queued its item.
+    if _wake_pending.is_set():
+        return
+    _wake_pending.set()
+    _wake_pipe()
+
+INSERT_SQL  = "INSERT INTO messages (ts, src, txt) VALUES (?,?,?)"
+BATCH_MAX, BATCH_WINDOW = 256, 0.1  # rows / seconds per transaction
+LOG_FLUSH_SECS = 0.5                # max time a debugOut line sits in json_fh
+LOG_BATCH_MAX  = 256                # log items per writev()
+
+db_q = queue.Queue()   # (ts, src, txt) rows for db_writer; None → flush and exit
 def db_writer():
-    while True:
-        ts, src, txt = db_q.get()
-        with db:
-            db.execute(
-                "INSERT INTO messages (ts, src, txt) VALUES (?,?,?)",
-                (ts, src, txt),
-            )
-        db_q.task_done()
+    """Drain db_q and commit whatever arrived within BATCH_WINDOW as one
+    transaction, so a burst of packets costs one fsync instead of N. A None
+    sentinel (main() at shutdown) ends the window early: rows queued ahead
+    of it are committed, then the thread exits."""
+    db = _connect()     # the only writer connection; lives on this thread
+    stop = False
+    while not stop:
+        item = db_q.get()
+        rows = []
+        deadline = time.monotonic() + BATCH_WINDOW
+        try:
+            while True:
+                if item is None:
+                    stop = True
+                    break
+                rows.append(item)
+                remaining = deadline - time.monotonic()
+                if len(rows) >= BATCH_MAX or remaining <= 0:
+                    break
+                item = db_q.get(timeout=remaining)
+        except queue.Empty:
+            pass
+        if rows:
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                db.executemany(INSERT_SQL, rows)
+                db.execute("COMMIT")
+            except sqlite3.Error as e:
+                if db.in_transaction:
+                    db.execute("ROLLBACK")
+                _log(f"# DB write error ({len(rows)} rows): {e}\n")
+        for _ in range(len(rows) + stop):
+            db_q.task_done()
+    db.close()
+
+log_q = queue.Queue(4096)   # packets and text lines for log_writer; None → exit
+def _log(item):
+    """Queue a packet (dict) or a text line for the log; never blocks, and
+    drops the item if log_writer has fallen that far behind."""
+    try:
+        log_q.put_nowait(item)
+    except queue.Full:
+        pass
 
-threading.Thread(target=db_writer, daemon=True).start()
+def log_writer():
+    """JSON-encode whatever is queued and append it to the log with one
+    os.writev() per burst, skipping the text-IO layer. json_fh (BLEInterface
+    debugOut only) is flushed every LOG_FLUSH_SECS. A None sentinel (main()
+    at shutdown) writes what is queued ahead of it, flushes and exits."""
+    last_flush = time.monotonic()
+    stop = False
+    while not stop:
+        items = []
+        try:
+            items.append(log_q.get(timeout=LOG_FLUSH_SECS))
+            while len(items) < LOG_BATCH_MAX:
+                items.append(log_q.get_nowait())
+        except queue.Empty:
+            pass
+        if None in items:
+            del items[items.index(None):]
+            stop = True
+        if items:
+            bufs = []
+            for item in items:
+                try:
+                    bufs.append(item.encode() if isinstance(item, str) else _dumps(item))
+                except (TypeError, ValueError):   # unencodable packet
+                    pass
+            try:
+                os.writev(log_fd, bufs)
+            except OSError:         # closed at shutdown
+                pass
+        now = time.monotonic()
+        if stop or now - last_flush >= LOG_FLUSH_SECS:
+            try:
+                json_fh.flush()
+            except ValueError:      # closed after a timed-out join
+                pass
+            last_flush = now
+
+db_thread = threading.Thread(target=db_writer, daemon=True)
+db_thread.start()
+log_thread = threading.Thread(target=log_writer, daemon=True)
+log_thread.start()
 
 
 # ── SIMPLE MESSAGE HANDLER ──────────────────────────────────────────────────
 def simple_message_handler(packet, interface=None, topic=pub.AUTO_TOPIC):
-    # writeflush helper
+    # logging is queued for log_writer; nothing here touches the file
     def log(line):
-        json_fh.write(line + "\n")
-        json_fh.flush()
+        _log(line + "\n")
 
-    log(f"# PACKET: topic={topic} packet={packet}")
     try:
+        if VERBOSE_LOG:
+            _log(packet)
+
         # --- extract text, src, ts exactly as before ---
         txt_field = None
         if isinstance(packet, dict):
-            dec = packet.get("decoded", {})
-            txt_field = dec.get("text") or dec.get("data", {}).get("text")
-            if txt_field is None and dec.get("data", {}).get("payload"):
+            get  = packet.get
+            dec  = get("decoded") or {}
+            data = dec.get("data") or {}
+            txt_field = dec.get("text") or data.get("text")
+            if txt_field is None and data.get("payload"):
                 try:
-                    pl = dec["data"]["payload"]
+                    pl = data["payload"]
                     txt_field = (bytes(pl) if isinstance(pl, list) else pl).decode("utf-8", "ignore")
                 except Exception:
                     pass
-            src = packet.get("fromId", "unknown")
-            ts  = packet.get("rxTime", time.time())
+            # fromId is None for nodes not yet in the node DB; fall back to
+            # the numeric id in the same "!xxxxxxxx" form
+            frm = get("from")
+            src = get("fromId") or (f"!{frm:08x}" if isinstance(frm, int) else "unknown")
+            ts  = get("rxTime") or time.time()
         else:
-            dec = getattr(packet, "decoded", None)
-            if dec:
-                txt_field = getattr(dec, "text", None)
-                data = getattr(dec, "data", None)
-                if txt_field is None and data:
-                    txt_field = getattr(data, "text", None)
-                    if txt_field is None and hasattr(data, "payload"):
-                        try:
-                            txt_field = bytes(data.payload).decode("utf-8", "ignore")
-                        except Exception:
-                            pass
-            src = getattr(packet, "fromId", "unknown")
-            ts  = getattr(packet, "rxTime", time.time())
+            # EAFP: the common case is one attribute chain, no probing
+            try:
+                txt_field = packet.decoded.text
+            except AttributeError:
+                try:
+                    data = packet.decoded.data
+                    try:
+                        txt_field = data.text
+                    except AttributeError:
+                        txt_field = bytes(data.payload).decode("utf-8", "ignore")
+                except Exception:
+                    pass
+            src = getattr(packet, "fromId", None) or "unknown"
+            ts  = getattr(packet, "rxTime", None) or time.time()
+            get = lambda k: getattr(packet, k, None)
 
         # --- bail if no text ---
         if not txt_field:
@@ -107,14 +279,14 @@ def simple_message_handler(packet, interface=None, topic=pub.AUTO_TOPIC):
             ts /= 1000
         text = txt_field[:MAX_LEN]
 
+        # only the fields we keep, not the whole packet
+        _log({"ts": ts, "src": src, "txt": text, "channel": get("channel"),
+              "rssi": get("rxRssi"), "snr": get("rxSnr")})
         log(f"# Received: {src}: {text}")
 
         # 1) enqueue to UI (non-blocking)
-        try:
-            incoming_q.put_nowait((ts, src, text))
-        except queue.Full:
-            # UI is backed up, drop
-            pass
+        incoming_q.put(_msg(ts, src, text))
+        _wake_ui()
 
         # 2) enqueue to DB writer (blocking if it ever needs to)
         db_q.put((ts, src, text))
@@ -123,34 +295,69 @@ def simple_message_handler(packet, interface=None, topic=pub.AUTO_TOPIC):
         log(f"# Message handler error: {e}")
 
 
+# Events from a retired interface are ignored: BLEInterface.close() always
+# publishes connection.lost, so the worker's own close of a dropped link
+# would otherwise land after its next reconnect_evt.clear() and tear the
+# new link down. established fires inside the BLEInterface() constructor,
+# before _radio_worker assigns _iface, hence the `_iface is None` case.
 def on_conn_established(interface=None, topic=pub.AUTO_TOPIC, **kwargs):
+    if interface is not _iface and _iface is not None:
+        return
     link_up_evt.set()
-    json_fh.write("# CONNECTION ESTABLISHED\n")
+    _log("# CONNECTION ESTABLISHED\n")
+    _wake_ui()
 
 def on_conn_lost(interface=None, topic=pub.AUTO_TOPIC, **kwargs):
+    _log("# CONNECTION LOST\n")
+    if interface is not _iface:
+        return      # the worker's own close() of a retired interface
     link_up_evt.clear()
-    json_fh.write("# CONNECTION LOST\n")
+    reconnect_evt.set()
+    _wake_ui()
 
 # ── PUBSUB SUBSCRIPTIONS ─────────────────────────────────────────────────────
-pub.subscribe(simple_message_handler,        "meshtastic.receive")       
+# Only the text subtopic: position/telemetry/nodeinfo packets (most of the
+# traffic) never reach the handler, where they were parsed and dropped.
+pub.subscribe(simple_message_handler,        "meshtastic.receive.text")
 pub.subscribe(on_conn_established,           "meshtastic.connection.established")
 pub.subscribe(on_conn_lost,                  "meshtastic.connection.lost")
 
-# ── SIMPLE RADIO WORKER (no locks, no retries) ───────────────────────────────
+# ── RADIO WORKER (no locks; reconnects on link loss) ─────────────────────────
 def _radio_worker():
     """
     1. Get an address (env‑var or auto‑scan)
-    2. Call BLEInterface(address).loop_forever()    ← library keeps it alive
+    2. Open BLEInterface(address) and sleep until the link is lost
     3. If it ever throws, wait 5 s and start again
     """
-    global _iface, connection_status
+    global _iface, connection_status, last_connection_attempt, connected_addr
+
+    # One event loop and one scanner for the life of the worker; asyncio.run()
+    # per scan rebuilt the loop and the D-Bus connection every time.
+    loop    = asyncio.new_event_loop()
+    scanner = None
+    found   = []
+
+    def _on_adv(dev, adv):
+        name = dev.name or adv.local_name
+        if name and name.lower().startswith("meshtastic"):
+            found.append(dev.address)
+
+    async def _scan(timeout):
+        nonlocal scanner
+        if scanner is None:
+            scanner = BleakScanner(detection_callback=_on_adv)
+        found.clear()
+        await scanner.start()
+        try:
+            deadline = loop.time() + timeout
+            while not found and loop.time() < deadline:
+                await asyncio.sleep(0.2)
+        finally:
+            await scanner.stop()
+        return found[0] if found else None
 
     def discover(timeout=5.0):
-        devs = asyncio.run(BleakScanner.discover(timeout=timeout))
-        for d in devs:
-            if d.name and d.name.lower().startswith("meshtastic"):
-                return d.address
-        return None
+        return loop.run_until_complete(_scan(timeout))
 
     backoff = 5        # seconds to wait after any exception
     while not stop_evt.is_set():
@@ -158,44 +365,78 @@ def _radio_worker():
             addr = NODE_ADDR.strip() if NODE_ADDR not in ("", "NOT_CONFIGURED") else ""
             if not addr:
                 connection_status = "Scanning for Meshtastic…"
+                last_connection_attempt = time.time()
                 addr = discover()
                 if not addr:
                     connection_status = "No device found"
-                    time.sleep(backoff)
+                    stop_evt.wait(backoff)
                     continue
 
             connection_status = f"Connecting to {addr}"
+            last_connection_attempt = time.time()
+            reconnect_evt.clear()
+            connected_addr = addr   # before the constructor: established fires inside it
             _iface = BLEInterface(address=addr, debugOut=json_fh)
             # Request message history on connection
             try:
                 _iface.localNode.requestConfig()
                 time.sleep(2)  # Give it time to sync messages
             except Exception as e:
-                json_fh.write(f"# Error requesting config: {e}\n")
+                _log(f"# Error requesting config: {e}\n")
             connection_status = "Connected"
-            _iface.loop_forever()            # ‑ never returns unless the link dies
+            # The library runs its own BLE threads; park here (no polling)
+            # until on_conn_lost or shutdown fires, then reconnect.
+            reconnect_evt.wait()
+            iface, _iface = _iface, None    # _sender stops using it first
+            try:   iface.close()
+            except Exception: pass
 
         except Exception as e:
             connection_status = f"Disconnected: {e}"
             link_up_evt.clear()
-            time.sleep(backoff)
+            stop_evt.wait(backoff)
 
 # ── HELPERS ──────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=4096)
+def _fmt_minute(minute: int) -> str:
+    return datetime.fromtimestamp(minute * 60).strftime("%H:%M")
+
+
 def _fmt(ts: float) -> str:
-    return datetime.fromtimestamp(ts).strftime("%H:%M")
+    # "%H:%M" only depends on the minute, so cache per minute, not per ts
+    return _fmt_minute(int(ts // 60))
+
+
+def _msg(ts: float, src: str, txt: str) -> tuple:
+    """UI message tuple; the row prefix is formatted once here, not per frame."""
+    return (ts, src, txt, f"{_fmt(ts)} {src or '':>10.10} │ ")
+
+
+@lru_cache(maxsize=512)
+def _rows(msg: tuple, w: int) -> tuple:
+    """Screen lines for one message at width w: wrapped once, then reused
+    by every redraw until the message scrolls out of the cache."""
+    _, _, txt, prefix = msg
+    indent = " " * len(prefix)
+    lines = textwrap.wrap(txt, width=w - len(prefix)) or [""]
+    return tuple((prefix if j == 0 else indent) + line for j, line in enumerate(lines))
 
 
 def _history(limit=2000):
-    cur = db.cursor()
-    cur.execute("SELECT ts, src, txt FROM messages ORDER BY ts DESC LIMIT ?", (limit,))
-    return list(reversed(cur.fetchall()))
+    # newest `limit` rows via idx_messages_ts, handed back oldest-first
+    with closing(_connect(readonly=True)) as ro:
+        cur = ro.execute("""
+          SELECT ts, src, txt FROM (
+            SELECT ts, src, txt FROM messages ORDER BY ts DESC LIMIT ?
+          ) ORDER BY ts ASC""", (limit,))
+        return [_msg(*row) for row in cur]
 
 
-def safe_footer(win, row: int, text: str, attr=0):
-    h, w = win.getmaxyx()
-    safe = text.ljust(w-1)[:w-1]
+def safe_footer(win, row: int, w: int, text: str, attr=0):
+    # w is the UI's cached width (updated on KEY_RESIZE), not getmaxyx()
     try:
-        win.addstr(row, 0, safe, attr)
+        win.addnstr(row, 0, text, w-1, attr)
+        win.clrtoeol()
     except curses.error:
         pass
 
@@ -207,6 +448,10 @@ def _ui(stdscr):
     curses.cbreak()
     stdscr.keypad(True)
     stdscr.nodelay(True)
+    # ncurses only queues KEY_RESIZE internally and SIGWINCH doesn't make
+    # stdin readable, so the untimed select() below would sleep through a
+    # resize. Wake through the pipe instead; the size is re-read on wake.
+    signal.signal(signal.SIGWINCH, lambda *_: _wake_pipe())
     
     # Colors
     curses.start_color()
@@ -221,7 +466,7 @@ def _ui(stdscr):
     warn_col = curses.color_pair(4)
 
     # Initial history and scroll position
-    msgs = _history()
+    msgs = deque(_history(), maxlen=MAX_MSGS)
     h, w = stdscr.getmaxyx()
     pane_h = h - PAD_V*2 - 2
     viewofs = max(0, len(msgs) - pane_h)
@@ -229,72 +474,112 @@ def _ui(stdscr):
     inp = ""
     TITLE = " Retro-Meshtastic Badge — Touch or ↑/↓ to scroll "
 
+    # What each screen region was last drawn from; a region is repainted
+    # only when its key changes, and curses sends just the damaged cells.
+    drawn = {}
+    pane_dirty = True
+    keys_pending = False
+
     while not stop_evt.is_set():
-        # 1) Auto-scroll logic
-        h, w = stdscr.getmaxyx()
-        pane_h = h - PAD_V*2 - 2
+        # 1) Auto-scroll logic (h, w, pane_h only change on KEY_RESIZE)
         was_bottom = (viewofs >= len(msgs) - pane_h)
-        new_msgs = False
-        try:
-            while True:
-                msgs.append(incoming_q.get_nowait())
-                new_msgs = True
-        except queue.Empty:
-            pass
-        if was_bottom and new_msgs:
-            viewofs = max(0, len(msgs) - pane_h)
-
-        # 2) Draw frame
-        stdscr.erase()
-        stdscr.addstr(0, 0, "╔" + TITLE.center(w-2, "═")[:w-2] + "╗", text_col)
+        new_msgs = incoming_q.drain()
+        if new_msgs:
+            # oldest messages fall off the deque; keep a scrolled view still
+            viewofs = max(0, viewofs - max(0, len(msgs) + len(new_msgs) - MAX_MSGS))
+            msgs.extend(new_msgs)
+            pane_dirty = True
+            if was_bottom:
+                viewofs = max(0, len(msgs) - pane_h)
+
+        # 2) Draw frame (resize → start from a blank screen)
+        if drawn.get("size") != (h, w):
+            stdscr.erase()
+            drawn = {"size": (h, w)}
+            stdscr.addstr(0, 0, "╔" + TITLE.center(w-2, "═")[:w-2] + "╗", text_col)
+            stdscr.addstr(h-2, 0, "╚" + "═"*(w-2) + "╝", text_col)
 
         # Connection status bar
         if link_up_evt.is_set():
-            safe_footer(stdscr, 1, f"[● LINKED] Connected to {NODE_ADDR}", yes_link)
-            row_start = PAD_V + 2
+            status = ((f"[● LINKED] Connected to {connected_addr}", yes_link),)
         else:
-            safe_footer(stdscr, 1, f"[○ NO LINK] {connection_status[:w-5]}", no_link)
+            status = ((f"[○ NO LINK] {connection_status[:w-5]}", no_link),)
             if h > 10:
                 debug = f"Last attempt: {int(time.time() - last_connection_attempt)}s ago"
-                safe_footer(stdscr, 2, debug[:w-1], warn_col)
-                row_start = PAD_V + 3
-            else:
-                row_start = PAD_V + 2
-
-        # 3) Render message history
-        row, used, idx = row_start, 0, viewofs
-        while used < pane_h and idx < len(msgs):
-            ts, src, txt = msgs[idx]
-            safe_src = (src or "")[:10]
-            prefix = f"{_fmt(ts)} {safe_src:>10} │ "
-            avail = w - len(prefix)
-            for j, line in enumerate(textwrap.wrap(txt, width=avail) or [""]):
-                if used >= pane_h:
+                status += ((debug[:w-1], warn_col),)
+        row_start = PAD_V + 1 + len(status)
+        if drawn.get("status") != status:
+            drawn["status"] = status
+            for r in range(1, row_start):
+                stdscr.move(r, 0); stdscr.clrtoeol()
+            for r, (line, attr) in enumerate(status, 1):
+                safe_footer(stdscr, r, w, line, attr)
+
+        # 3) Render message history, rewriting only rows whose text changed
+        pane_key = (row_start, viewofs)
+        if pane_dirty or drawn.get("pane") != pane_key:
+            drawn["pane"], pane_dirty = pane_key, False
+            rows_avail = min(pane_h, h - 2 - row_start)   # stop above the border
+            lines = []
+            for m in itertools.islice(msgs, viewofs, None):
+                if len(lines) >= rows_avail:
                     break
-                line_out = (prefix + line if j == 0 else ' ' * len(prefix) + line).ljust(w)[:w]
-                stdscr.addstr(row + used, 0, line_out, text_col)
-                used += 1
-            idx += 1
-
-        stdscr.addstr(h-2, 0, "╚" + "═"*(w-2) + "╝", text_col)
+                lines.extend(_rows(m, w))
+            del lines[rows_avail:]
+            lines += [None] * (rows_avail - len(lines))   # None → blank row
+            prev_start, prev = drawn.get("lines", (row_start, ()))
+            if prev_start != row_start:
+                prev = ()
+            for i, line in enumerate(lines):
+                if i < len(prev) and prev[i] == line:
+                    continue
+                if line is None:
+                    stdscr.move(row_start + i, 0); stdscr.clrtoeol()
+                else:
+                    stdscr.addnstr(row_start + i, 0, line, w, text_col)
+                    if len(line) < w:   # a full-width line leaves the cursor on the next row
+                        stdscr.clrtoeol()
+            drawn["lines"] = (row_start, lines)
 
         # 4) Footer / send prompt
-        if send_mode:
-            prompt = f"Send> {inp}"
-            safe_footer(stdscr, h-1, prompt, text_col)
-            stdscr.move(h-1, min(len(prompt), w-2))
-        else:
-            footer = "[S]end  [Ctrl-C/Q] quit  ↑/↓ PgUp/PgDn  Touch scroll"
-            safe_footer(stdscr, h-1, footer, text_col)
-
-        stdscr.refresh()
-        curses.napms(100)
-
-        # 5) Handle input
+        footer_key = (send_mode, inp)
+        if drawn.get("footer") != footer_key:
+            drawn["footer"] = footer_key
+            if send_mode:
+                prompt = f"Send> {inp}"
+                safe_footer(stdscr, h-1, w, prompt, text_col)
+                stdscr.move(h-1, min(len(prompt), w-2))
+            else:
+                footer = "[S]end  [Ctrl-C/Q] quit  ↑/↓ PgUp/PgDn  Touch scroll"
+                safe_footer(stdscr, h-1, w, footer, text_col)
+
+        if stdscr.is_wintouched():  # idle wake-ups skip the refresh entirely
+            stdscr.noutrefresh()
+            curses.doupdate()
+
+        # 5) Sleep until a key or a producer wake-up. Without a link, tick
+        #    once a second so the "Last attempt" counter keeps moving.
+        if not keys_pending:
+            ready, _, _ = select.select([sys.stdin, _wake_r], [], [],
+                                        None if link_up_evt.is_set() else 1.0)
+            if _wake_r in ready:
+                os.read(_wake_r, 4096)
+                _wake_pending.clear()   # after the read, or a wake-up is lost
+                try:
+                    cols, rows = os.get_terminal_size(sys.__stdout__.fileno())
+                except OSError:
+                    cols, rows = w, h
+                if curses.is_term_resized(rows, cols):
+                    curses.resizeterm(rows, cols)
+                    h, w = stdscr.getmaxyx()
+                    pane_h = h - PAD_V*2 - 2
+
+        # 6) Handle input
         try:
             c = stdscr.getch()
         except curses.error:
             c = -1
+        keys_pending = c != -1    # curses may hold more buffered keys
 
         # Quit
         if c in (3, ord('q'), ord('Q')):
@@ -309,7 +594,6 @@ def _ui(stdscr):
         # Send-mode textbox
         if send_mode:
             curses.curs_set(1)
-            h, w = stdscr.getmaxyx()
             prompt = "Send> "
             stdscr.addstr(h-1, 0, prompt, text_col); stdscr.clrtoeol(); stdscr.refresh()
             win = curses.newwin(1, w - len(prompt) - 1, h-1, len(prompt))
@@ -324,7 +608,8 @@ def _ui(stdscr):
             if s:
                 ts = time.time()
                 db_q.put((ts, "You", s))           # hand off to the writer thread
-                msgs.append((ts, "You", s))
+                msgs.append(_msg(ts, "You", s))
+                pane_dirty = True
                 outgoing_q.put(s)
             continue
 
@@ -337,6 +622,9 @@ def _ui(stdscr):
             viewofs = max(0, viewofs-pane_h)
         elif c == curses.KEY_NPAGE:
             viewofs = min(len(msgs)-pane_h, viewofs+pane_h)
+        elif c == curses.KEY_RESIZE:
+            h, w = stdscr.getmaxyx()
+            pane_h = h - PAD_V*2 - 2
 
 
         # Clamp scroll range
@@ -344,35 +632,27 @@ def _ui(stdscr):
 # ── Entrypoint ───────────────────────────────────────────────────────────────
 def _sig(*_):
     stop_evt.set()
+    reconnect_evt.set()
+    _wake_pipe()
 
 def _sender():
     while not stop_evt.is_set():
         msg = outgoing_q.get()
         try:
-            if _iface: _iface.sendText(msg, wantAck=True)
+            iface = _iface      # one read: the worker may swap it mid-send
+            if iface: iface.sendText(msg, wantAck=True)
         except Exception as e:
-            json_fh.write(f"# sendText error: {e}\n")
+            _log(f"# sendText error: {e}\n")
 
 def main():
-    global _iface
     signal.signal(signal.SIGINT,  _sig)
     signal.signal(signal.SIGTERM, _sig)
 
-    # 1) Connect once (or exit)
-    try:
-        _iface = BLEInterface(address=NODE_ADDR, debugOut=json_fh)
-    except Exception as e:
-        print(f"❌ Unable to connect to {NODE_ADDR}: {e}")
-        return
+    # 1) Radio worker: connect (scanning if no address), reconnect on loss
+    worker = threading.Thread(target=_radio_worker, daemon=True)
+    worker.start()
 
     # 2) Sender thread: pull from outgoing_q → sendText()
-    def _sender():
-        while not stop_evt.is_set():
-            msg = outgoing_q.get()
-            try:
-                _iface.sendText(msg, wantAck=True)
-            except Exception as send_err:
-                json_fh.write(f"# sendText error: {send_err}\n")
     threading.Thread(target=_sender, daemon=True).start()
     
     # 3.5) Make sure any messages we've already received are fully
@@ -381,11 +661,7 @@ def main():
     #       don’t re-drain them as “new” messages).
     db_q.join()  # wait for the db_writer thread to finish all pending writes
     # clear any already-queued items in incoming_q
-    try:
-        while True:
-            incoming_q.get_nowait()
-    except queue.Empty:
-        pass
+    incoming_q.drain()
 
     # 3) Run the UI (blocks here, keeping the process—and BLE thread—alive)
     try:
@@ -394,10 +670,17 @@ def main():
         pass
     finally:
         stop_evt.set()
-        try:   _iface.close()
-        except: pass
+        reconnect_evt.set()
+        worker.join(timeout=5)   # the worker is the only one that closes _iface
+        db_q.put(None)           # commit rows still queued or in BATCH_WINDOW
+        db_thread.join(timeout=5)
+        try:                     # log lines from the above land before close
+            log_q.put(None, timeout=1)
+        except queue.Full:
+            pass
+        log_thread.join(timeout=5)
         json_fh.close()
-        db.close()
+        os.close(log_fd)
 
 if __name__ == "__main__":
     main()
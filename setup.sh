@@ -52,7 +52,7 @@ sudo -u "$REAL_USER" python3 -m venv "$VENV_DIR"
 # install Python packages
 sudo -u "$REAL_USER" bash -c "source '$VENV_DIR/bin/activate' \
   && pip install --upgrade pip \
-  && pip install meshtastic[ble] bleak pypubsub"
+  && pip install meshtastic[ble] bleak pypubsub orjson"
 
 echo
 echo "✅  Setup complete!"